@@ -1,93 +1,175 @@
 """
 music_playlist_gui_c.py
 Run in VS Code: Python 3.x
-This version uses the C backend compiled as a shared library (DLL / .so).
+This version uses the C backend compiled into a CPython extension module
+(playlist_backend_ext, see setup.py). Requires: pip install orjson
 It does NOT use in-app playback; instead it opens YouTube / Google in the browser.
 """
 
 import os
-import ctypes
-import json
 import hashlib
-import webbrowser
-import urllib.parse
+import hmac
+import queue
+import sqlite3
+import string
+import threading
+from functools import lru_cache
+import orjson
 from tkinter import *
 from tkinter import messagebox, simpledialog, filedialog
 
 # ---------- load C library ----------
-LIB_WINDOWS = "playlist_backend.dll"
-LIB_UNIX = "./libplaylist.so"
-
-if os.name == "nt":
-    libpath = os.path.join(os.getcwd(), LIB_UNIX)
-else:
-    libpath = LIB_UNIX
-
-if not os.path.exists(libpath):
-    raise FileNotFoundError(f"C shared library not found at: {libpath}\nCompile playlist_backend.c first.")
-
-lib = ctypes.CDLL(libpath)
-
-# declare arg/return types
-lib.initSystem.restype = None
-lib.add_song.argtypes = [ctypes.c_char_p]
-lib.add_song.restype = None
-lib.search_song.argtypes = [ctypes.c_char_p]
-lib.search_song.restype = ctypes.c_int
-lib.play_song.argtypes = [ctypes.c_char_p]
-lib.play_song.restype = None
-lib.most_played.restype = ctypes.c_char_p
-lib.save_songs.argtypes = [ctypes.c_char_p]
-lib.save_songs.restype = None
-lib.load_songs.argtypes = [ctypes.c_char_p]
-lib.load_songs.restype = None
+MAX_NAME = 256  # matches MAX_NAME in playlist_backend.c
+
+try:
+    import playlist_backend_ext as lib
+except ImportError as e:
+    raise ImportError("C extension playlist_backend_ext not found.\n"
+                      "Build it first: python setup.py build_ext --inplace (or make).") from e
 
 lib.initSystem()
 
 # ---------- simple user DB ----------
-USERS_FILE = "users_db.json"
-
-def load_users():
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-def save_users(data):
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-def hash_pass(pwd):
-    return hashlib.sha256(pwd.encode("utf-8")).hexdigest()
-
-users = load_users()
+USERS_DB = "users.db"
+LEGACY_USERS_FILE = "users_db.json"  # pre-SQLite store, imported once
+DB_MMAP_SIZE = 64 * 1024 * 1024
+HASH_ALGO = "scrypt"  # records with any other hash_algo are rehashed on login
+
+def open_db():
+    conn = sqlite3.connect(USERS_DB)
+    # WAL appends each commit to a log that SQLite checkpoints back into the
+    # main file; synchronous=NORMAL keeps commits atomic without an fsync
+    # per write, and reads go through a memory map
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    conn.execute("CREATE TABLE IF NOT EXISTS users ("
+                 "name TEXT PRIMARY KEY, pwd_hash BLOB, salt BLOB, playlist TEXT, hash_algo TEXT)")
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(users)")]
+    if "hash_algo" not in cols:
+        with conn:
+            conn.execute("ALTER TABLE users ADD COLUMN hash_algo TEXT")
+            conn.execute("UPDATE users SET hash_algo = "
+                         "CASE WHEN salt IS NULL THEN 'sha256' ELSE 'scrypt' END")
+    if os.path.exists(LEGACY_USERS_FILE) and not conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+        with open(LEGACY_USERS_FILE, "rb") as f:
+            legacy = orjson.loads(f.read())
+        with conn:
+            for name, rec in legacy.items():
+                salt = bytes.fromhex(rec["salt"]) if "salt" in rec else None
+                conn.execute("INSERT INTO users (name, pwd_hash, salt, playlist, hash_algo) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (name, bytes.fromhex(rec["pwd_hash"]), salt,
+                              orjson.dumps(rec.get("playlist", [])).decode("utf-8"),
+                              "scrypt" if salt else "sha256"))
+    return conn
+
+def get_user(name):
+    # returns (pwd_hash, salt, hash_algo, playlist) or None
+    row = db.execute("SELECT pwd_hash, salt, hash_algo, playlist FROM users WHERE name=?",
+                     (name,)).fetchone()
+    if row is None:
+        return None
+    return row[0], row[1], row[2], orjson.loads(row[3] or "[]")
+
+def create_user(name, pwd_hash, salt):
+    with db:
+        db.execute("INSERT INTO users (name, pwd_hash, salt, playlist, hash_algo) "
+                   "VALUES (?, ?, ?, ?, ?)", (name, pwd_hash, salt, "[]", HASH_ALGO))
+
+def set_password(name, pwd_hash, salt):
+    with db:
+        db.execute("UPDATE users SET pwd_hash=?, salt=?, hash_algo=? WHERE name=?",
+                   (pwd_hash, salt, HASH_ALGO, name))
+
+def save_playlist(name, playlist):
+    with db:
+        db.execute("UPDATE users SET playlist=? WHERE name=?",
+                   (orjson.dumps(playlist).decode("utf-8"), name))
+
+def hash_pass(pwd, salt=None):
+    # scrypt with a per-user salt; returns (salt, hash) as bytes
+    if salt is None:
+        salt = os.urandom(16)
+    key = hashlib.scrypt(pwd.encode("utf-8"), salt=salt, n=2**14, r=8, p=1, dklen=32)
+    return salt, key
+
+def check_pass(pwd_hash, salt, algo, pwd):
+    if algo == "sha256":
+        # legacy record: unsalted sha256
+        return hmac.compare_digest(pwd_hash, hashlib.sha256(pwd.encode("utf-8")).digest())
+    if algo == "scrypt":
+        _, key = hash_pass(pwd, salt)
+        return hmac.compare_digest(pwd_hash, key)
+    return False
+
+db = open_db()
 current_user = None
 current_playlist = []  # Python-side playlist (per-user)
 
 # ---------- wrappers to C ----------
+# Python mirror of the names in the C library, keyed the way the trie
+# matches them (ASCII letters only, lowercased); backs the word index used
+# for partial search
+_songs = {}        # song key -> name as first added
+_token_index = {}  # lowercased word -> set of song keys, for partial search
+
+def _song_key(name: str) -> str:
+    kept = [c for c in name if c == " " or c in string.ascii_letters]
+    return "".join(kept[:MAX_NAME - 1]).replace(" ", "").lower()
+
+def _index_song(name: str):
+    key = _song_key(name)
+    if key in _songs:
+        return
+    _songs[key] = name
+    for tok in name.lower().split():
+        _token_index.setdefault(tok, set()).add(key)
+
+def find_songs_by_words(query: str) -> list:
+    # names containing every word of the query, in any order
+    sets = [_token_index.get(tok, set()) for tok in query.lower().split()]
+    if not sets:
+        return []
+    keys = set.intersection(*sets)
+    return sorted(_songs[k] for k in keys)
+
 def c_add_song(name: str):
-    lib.add_song(name.encode("utf-8"))
+    lib.add_song(name)
+    _index_song(name)
+
+def c_add_songs(names):
+    # one call into C for the whole batch
+    lib.add_songs_bulk(names)
+    for n in names:
+        _index_song(n)
 
 def c_search_song(name: str) -> bool:
-    return lib.search_song(name.encode("utf-8")) == 1
+    return lib.search_song(name) == 1
 
 def c_play_song(name: str):
-    lib.play_song(name.encode("utf-8"))
+    lib.play_song(name)
 
 def c_most_played() -> str:
-    try:
-        res = lib.most_played()
-        if not res:
-            return ""
-        return res.decode("utf-8")
-    except Exception:
-        return ""
+    return lib.most_played()
+
+_mp_cache = (-1, "")  # (play version, most played name)
+
+def c_most_played_cached() -> str:
+    global _mp_cache
+    version = lib.get_play_version()
+    if version != _mp_cache[0]:
+        _mp_cache = (version, c_most_played())
+    return _mp_cache[1]
 
 def c_save_songs(path: str):
-    lib.save_songs(path.encode("utf-8"))
+    lib.save_songs(path)
 
 def c_load_songs(path: str):
-    lib.load_songs(path.encode("utf-8"))
+    # parse in Python so the mirror set is filled, then insert in one call
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        names = [line.rstrip("\r\n") for line in f]
+    c_add_songs([n for n in names if n])
 
 # ---------- GUI logic ----------
 root = Tk()
@@ -95,34 +177,67 @@ root.title("Musify Playlist Manager")
 root.geometry("640x520")
 root.resizable(False, False)
 
+# playlist writes are coalesced: mutations mark it dirty, a timer flushes
+SAVE_DELAY_MS = 1500
+_dirty = False
+_flush_job = None
+
+def mark_dirty():
+    global _dirty, _flush_job
+    _dirty = True
+    if _flush_job is None:
+        _flush_job = root.after(SAVE_DELAY_MS, flush_playlist)
+
+def flush_playlist():
+    global _dirty, _flush_job
+    if _flush_job is not None:
+        root.after_cancel(_flush_job)
+        _flush_job = None
+    if _dirty and current_user:
+        save_playlist(current_user, current_playlist)
+    _dirty = False
+
+def on_close():
+    flush_playlist()
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # fold the log back in
+    db.close()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+
 # Top: user label and login/signup
 lbl_user = Label(root, text="Not logged in", font=("Arial", 11))
 lbl_user.pack(pady=6)
 
 def do_signup():
-    global users
     uname = simpledialog.askstring("Sign up", "Username:", parent=root)
     if not uname: return
     pwd = simpledialog.askstring("Sign up", "Password:", show="*", parent=root)
     if not pwd: return
-    if uname in users:
+    if get_user(uname) is not None:
         messagebox.showerror("Error", "Username already exists.")
         return
-    users[uname] = {"pwd_hash": hash_pass(pwd), "playlist": []}
-    save_users(users)
+    salt, pwd_hash = hash_pass(pwd)
+    create_user(uname, pwd_hash, salt)
     messagebox.showinfo("Signup", "Signup successful — now login.")
 
 def do_login():
-    global current_user, current_playlist, users
+    global current_user, current_playlist
     uname = simpledialog.askstring("Login", "Username:", parent=root)
     if not uname: return
     pwd = simpledialog.askstring("Login", "Password:", show="*", parent=root)
     if not pwd: return
-    if uname not in users or users[uname]["pwd_hash"] != hash_pass(pwd):
+    rec = get_user(uname)
+    if rec is None or not check_pass(rec[0], rec[1], rec[2], pwd):
         messagebox.showerror("Error", "Invalid credentials.")
         return
+    if rec[2] != HASH_ALGO:
+        # upgrade older hashes now that we have the plaintext
+        salt, pwd_hash = hash_pass(pwd)
+        set_password(uname, pwd_hash, salt)
+    flush_playlist()  # pending changes belong to the previous user
     current_user = uname
-    current_playlist = users[uname].get("playlist", [])
+    current_playlist = rec[3]
     lbl_user.config(text=f"Logged in: {current_user}")
     refresh_playlist()
     messagebox.showinfo("Login", f"Welcome, {current_user}!")
@@ -150,8 +265,7 @@ def add_song_ui():
     c_add_song(s)
     if current_user:
         current_playlist.append(s)
-        users[current_user]["playlist"] = current_playlist
-        save_users(users)
+        mark_dirty()
     refresh_playlist()
     messagebox.showinfo("Added", f"Added '{s}' to library.")
 
@@ -163,27 +277,39 @@ def search_song_ui():
     found = c_search_song(s)
     if found:
         messagebox.showinfo("Found", f"'{s}' exists in library.")
+        return
+    partial = find_songs_by_words(s)
+    if partial:
+        shown = "\n".join(partial[:10]) + ("\n..." if len(partial) > 10 else "")
+        messagebox.showinfo("Not found", f"'{s}' not found in library. Songs with these words:\n{shown}")
     else:
         messagebox.showinfo("Not found", f"'{s}' not found in library.")
 
+@lru_cache(maxsize=256)
+def _quote_song(s):
+    import urllib.parse  # deferred: only needed once a button is clicked
+    return urllib.parse.quote(s + " song")
+
 def play_song_ui():
+    import webbrowser
     s = entry_song.get().strip()
     if not s:
         messagebox.showerror("Error", "Enter a song name")
         return
     c_play_song(s)             # increments play count in C heap
-    lbl_most.config(text=f"Most Played: {c_most_played() or '-'}")
+    lbl_most.config(text=f"Most Played: {c_most_played_cached() or '-'}")
     # open search results on YouTube for playback
-    q = urllib.parse.quote(s + " song")
+    q = _quote_song(s)
     webbrowser.open(f"https://www.youtube.com/results?search_query={q}")
     messagebox.showinfo("Playing", f"Opened YouTube search for '{s}'.")
 
 def google_search_ui():
+    import webbrowser
     s = entry_song.get().strip()
     if not s:
         messagebox.showerror("Error", "Enter a song name")
         return
-    q = urllib.parse.quote(s + " song")
+    q = _quote_song(s)
     webbrowser.open(f"https://www.google.com/search?q={q}")
 
 btn_add = Button(frm_controls, text="Add Song", width=12, command=add_song_ui)
@@ -198,13 +324,15 @@ btn_google.grid(row=0, column=3, padx=6)
 # Bottom: playlist box & controls
 lbl_playlist = Label(root, text="Playlist (current user)")
 lbl_playlist.pack(pady=6)
-listbox = Listbox(root, width=80, height=14)
+playlist_var = StringVar(value=())
+listbox = Listbox(root, width=80, height=14, listvariable=playlist_var)
 listbox.pack(pady=6)
 
 def refresh_playlist():
-    listbox.delete(0, END)
-    for i, s in enumerate(current_playlist):
-        listbox.insert(END, f"{i+1}. {s}")
+    # replace the whole list in one Tcl call; unlike delete(0, END) this keeps
+    # the old selection, so clear it explicitly
+    listbox.selection_clear(0, END)
+    playlist_var.set(tuple(f"{i+1}. {name}" for i, name in enumerate(current_playlist)))
 
 def load_selected_to_entry():
     sel = listbox.curselection()
@@ -213,7 +341,7 @@ def load_selected_to_entry():
     entry_song.insert(0, current_playlist[sel[0]])
 
 def remove_selected():
-    global current_playlist, users
+    global current_playlist
     if not current_user:
         messagebox.showerror("Error", "Login first.")
         return
@@ -223,8 +351,7 @@ def remove_selected():
         return
     idx = sel[0]
     s = current_playlist.pop(idx)
-    users[current_user]["playlist"] = current_playlist
-    save_users(users)
+    mark_dirty()
     refresh_playlist()
     messagebox.showinfo("Removed", f"Removed '{s}' from playlist.")
 
@@ -234,11 +361,40 @@ def save_library_file():
     c_save_songs(path)
     messagebox.showinfo("Saved", f"Library saved to {path}")
 
+# library loads run on a worker thread; Tk is only touched from the main
+# thread, which polls this queue for the result
+_load_done = queue.Queue()
+
+def _load_worker(path):
+    try:
+        c_load_songs(path)
+        _load_done.put((path, None))
+    except Exception as e:
+        _load_done.put((path, e))
+
+def _set_library_buttons(state):
+    # the C library is not thread-safe, so keep other library calls out
+    for b in (btn_add, btn_search, btn_save_lib, btn_load_lib):
+        b.config(state=state)
+
+def _poll_load():
+    try:
+        path, err = _load_done.get_nowait()
+    except queue.Empty:
+        root.after(50, _poll_load)
+        return
+    _set_library_buttons(NORMAL)
+    if err:
+        messagebox.showerror("Error", f"Could not load {path}: {err}")
+    else:
+        messagebox.showinfo("Loaded", f"Library loaded from {path}")
+
 def load_library_file():
     path = filedialog.askopenfilename(filetypes=[("Text","*.txt")])
     if not path: return
-    c_load_songs(path)
-    messagebox.showinfo("Loaded", f"Library loaded from {path}")
+    _set_library_buttons(DISABLED)
+    threading.Thread(target=_load_worker, args=(path,), daemon=True).start()
+    root.after(50, _poll_load)
 
 frm_playlist_controls = Frame(root)
 frm_playlist_controls.pack(pady=6)
@@ -251,7 +407,7 @@ btn_save_lib.grid(row=0, column=2, padx=6)
 btn_load_lib = Button(frm_playlist_controls, text="Load Library", command=load_library_file)
 btn_load_lib.grid(row=0, column=3, padx=6)
 
-lbl_most = Label(root, text=f"Most Played: {c_most_played() or '-'}", font=("Arial", 11, "bold"))
+lbl_most = Label(root, text=f"Most Played: {c_most_played_cached() or '-'}", font=("Arial", 11, "bold"))
 lbl_most.pack(pady=6)
 
 # If there is an 'initial_songs.txt' file, load it into C backend
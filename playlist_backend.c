@@ -1,5 +1,6 @@
 // playlist_backend.c
-// Compile to shared library: libplaylist.so (Linux/mac) or playlist_backend.dll (Windows)
+// Linked into the playlist_backend_ext Python module (playlist_backend_ext.c, setup.py);
+// `make` builds it with -O3 -march=native -flto, `make libplaylist.so` builds a plain shared library
 
 #include <stdio.h>
 #include <stdlib.h>
@@ -8,6 +9,12 @@
 #define MAX_SONGS 2000
 #define MAX_NAME 256
 
+#if defined(__GNUC__)
+#define UNLIKELY(x) __builtin_expect(!!(x), 0)
+#else
+#define UNLIKELY(x) (x)
+#endif
+
 // ---------------- Trie Node for Search -----------------
 typedef struct TrieNode {
     struct TrieNode* children[26];
@@ -69,8 +76,8 @@ int searchSong(TrieNode* root, const char* word) {
         char ch = cleaned[i];
         if (ch == ' ') continue;
         int index = ch - 'a';
-        if (index < 0 || index >= 26) return 0;
-        if (!curr->children[index]) return 0;
+        if (UNLIKELY(index < 0 || index >= 26)) return 0;
+        if (UNLIKELY(!curr->children[index])) return 0;
         curr = curr->children[index];
     }
     return curr->isEndOfWord;
@@ -80,13 +87,28 @@ int searchSong(TrieNode* root, const char* word) {
 typedef struct {
     char name[MAX_NAME];
     int plays;
+    int slot;  // this song's slot in playIndex
 } Song;
 
 static Song heap[MAX_SONGS];
 static int heapSize = 0;
+static int playVersion = 0;  // bumped whenever the most played song changes
+
+// open-addressing hash index: name -> heap position + 1 (0 = empty slot),
+// so a play finds its song without scanning the heap
+#define PLAY_SLOTS 4096  // power of two, more than 2 * MAX_SONGS
+static int playIndex[PLAY_SLOTS];
+
+static unsigned int hashName(const char* s) {
+    unsigned int h = 2166136261u;  // FNV-1a
+    while (*s) { h ^= (unsigned char)*s++; h *= 16777619u; }
+    return h & (PLAY_SLOTS - 1);
+}
 
 void swapSong(Song* a, Song* b) {
     Song temp = *a; *a = *b; *b = temp;
+    playIndex[a->slot] = (int)(a - heap) + 1;
+    playIndex[b->slot] = (int)(b - heap) + 1;
 }
 
 void heapifyUp(int index) {
@@ -111,18 +133,26 @@ void heapifyDown(int index) {
 void addSongPlayInternal(const char* name) {
     if (!name) return;
     char cleaned[MAX_NAME]; sanitize_and_lower(name, cleaned);
-    for (int i = 0; i < heapSize; i++) {
+    int oldRoot = heapSize ? heap[0].slot : -1;  // slots identify songs
+    unsigned int h = hashName(cleaned);
+    while (playIndex[h]) {
+        int i = playIndex[h] - 1;
         if (strcmp(heap[i].name, cleaned) == 0) {
             heap[i].plays++;
             heapifyUp(i);
+            if (heap[0].slot != oldRoot) playVersion++;
             return;
         }
+        h = (h + 1) & (PLAY_SLOTS - 1);
     }
-    if (heapSize >= MAX_SONGS) return;
+    if (heapSize >= MAX_SONGS) return;  // play ignored, nothing changed
     strncpy(heap[heapSize].name, cleaned, MAX_NAME-1);
     heap[heapSize].plays = 1;
+    heap[heapSize].slot = h;
+    playIndex[h] = heapSize + 1;
     heapifyUp(heapSize);
     heapSize++;
+    if (heap[0].slot != oldRoot) playVersion++;
 }
 
 const char* getMostPlayed() {
@@ -182,6 +212,8 @@ EXPORT void initSystem() {
     }
     globalRoot = createNode();
     heapSize = 0;
+    memset(playIndex, 0, sizeof(playIndex));
+    playVersion++;
 }
 
 EXPORT void add_song(const char* song) {
@@ -189,6 +221,12 @@ EXPORT void add_song(const char* song) {
     insertSong(globalRoot, song);
 }
 
+EXPORT void add_songs_bulk(const char** songs, size_t n) {
+    if (!songs) return;
+    if (!globalRoot) initSystem();
+    for (size_t i = 0; i < n; i++) insertSong(globalRoot, songs[i]);
+}
+
 EXPORT int search_song(const char* song) {
     if (!globalRoot) return 0;
     return searchSong(globalRoot, song);
@@ -204,6 +242,10 @@ EXPORT const char* most_played() {
     return s;
 }
 
+EXPORT int get_play_version() {
+    return playVersion;
+}
+
 EXPORT void save_songs(const char* filename) {
     save_songs_to_file(filename);
 }
@@ -0,0 +1,138 @@
+// playlist_backend_ext.c
+// CPython extension module wrapping playlist_backend.c, which is compiled into
+// the same module (see setup.py): calls go straight from Python to C without
+// a shared library and libffi in between.
+// Build: python setup.py build_ext --inplace   (or `make`)
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+// exported by playlist_backend.c
+void initSystem();
+void add_song(const char* song);
+void add_songs_bulk(const char** songs, size_t n);
+int search_song(const char* song);
+void play_song(const char* song);
+const char* most_played();
+int get_play_version();
+void save_songs(const char* filename);
+void load_songs(const char* filename);
+
+// "O&" converter: accepts str (UTF-8, cached on the str object by CPython)
+// or already-encoded bytes; the pointer is borrowed from the argument
+static int as_cstr(PyObject* obj, void* out) {
+    const char** p = (const char**)out;
+    if (PyBytes_Check(obj)) {
+        *p = PyBytes_AS_STRING(obj);
+        return 1;
+    }
+    if (PyUnicode_Check(obj)) {
+        *p = PyUnicode_AsUTF8(obj);
+        return *p != NULL;
+    }
+    PyErr_Format(PyExc_TypeError, "expected str or bytes, got %.200s", Py_TYPE(obj)->tp_name);
+    return 0;
+}
+
+static PyObject* py_initSystem(PyObject* self, PyObject* args) {
+    initSystem();
+    Py_RETURN_NONE;
+}
+
+static PyObject* py_add_song(PyObject* self, PyObject* args) {
+    const char* s;
+    if (!PyArg_ParseTuple(args, "O&", as_cstr, &s)) return NULL;
+    add_song(s);
+    Py_RETURN_NONE;
+}
+
+static PyObject* py_add_songs_bulk(PyObject* self, PyObject* args) {
+    PyObject* seq;
+    if (!PyArg_ParseTuple(args, "O", &seq)) return NULL;
+    // snapshot into a new tuple: it holds its own references to the names, so
+    // other threads mutating `seq` while the GIL is released cannot free the
+    // buffers passed to C (PySequence_Fast would return a list unchanged)
+    PyObject* snap = PySequence_Tuple(seq);
+    if (!snap) return NULL;
+    Py_ssize_t n = PyTuple_GET_SIZE(snap);
+    const char** names = PyMem_Malloc((n > 0 ? n : 1) * sizeof(const char*));
+    if (!names) {
+        Py_DECREF(snap);
+        return PyErr_NoMemory();
+    }
+    for (Py_ssize_t i = 0; i < n; i++) {
+        if (!as_cstr(PyTuple_GET_ITEM(snap, i), &names[i])) {
+            PyMem_Free(names);
+            Py_DECREF(snap);
+            return NULL;
+        }
+    }
+    Py_BEGIN_ALLOW_THREADS
+    add_songs_bulk(names, (size_t)n);
+    Py_END_ALLOW_THREADS
+    PyMem_Free(names);
+    Py_DECREF(snap);
+    Py_RETURN_NONE;
+}
+
+static PyObject* py_search_song(PyObject* self, PyObject* args) {
+    const char* s;
+    if (!PyArg_ParseTuple(args, "O&", as_cstr, &s)) return NULL;
+    return PyLong_FromLong(search_song(s));
+}
+
+static PyObject* py_play_song(PyObject* self, PyObject* args) {
+    const char* s;
+    if (!PyArg_ParseTuple(args, "O&", as_cstr, &s)) return NULL;
+    play_song(s);
+    Py_RETURN_NONE;
+}
+
+static PyObject* py_most_played(PyObject* self, PyObject* args) {
+    const char* s = most_played();
+    if (!s) s = "";
+    return PyUnicode_DecodeUTF8(s, (Py_ssize_t)strlen(s), "replace");
+}
+
+static PyObject* py_get_play_version(PyObject* self, PyObject* args) {
+    return PyLong_FromLong(get_play_version());
+}
+
+static PyObject* py_save_songs(PyObject* self, PyObject* args) {
+    const char* path;
+    if (!PyArg_ParseTuple(args, "O&", as_cstr, &path)) return NULL;
+    Py_BEGIN_ALLOW_THREADS
+    save_songs(path);
+    Py_END_ALLOW_THREADS
+    Py_RETURN_NONE;
+}
+
+static PyObject* py_load_songs(PyObject* self, PyObject* args) {
+    const char* path;
+    if (!PyArg_ParseTuple(args, "O&", as_cstr, &path)) return NULL;
+    Py_BEGIN_ALLOW_THREADS
+    load_songs(path);
+    Py_END_ALLOW_THREADS
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef methods[] = {
+    {"initSystem", py_initSystem, METH_NOARGS, "Reset the song library and play counts."},
+    {"add_song", py_add_song, METH_VARARGS, "Add a song name to the library."},
+    {"add_songs_bulk", py_add_songs_bulk, METH_VARARGS, "Add a sequence of song names in one call."},
+    {"search_song", py_search_song, METH_VARARGS, "Return 1 if the song is in the library, else 0."},
+    {"play_song", py_play_song, METH_VARARGS, "Count one play of a song."},
+    {"most_played", py_most_played, METH_NOARGS, "Return the most played song name, or ''."},
+    {"get_play_version", py_get_play_version, METH_NOARGS, "Return a counter bumped whenever the most played song changes."},
+    {"save_songs", py_save_songs, METH_VARARGS, "Write library song names to a text file."},
+    {"load_songs", py_load_songs, METH_VARARGS, "Read song names from a text file into the library."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef moduledef = {
+    PyModuleDef_HEAD_INIT, "playlist_backend_ext", "Musify playlist backend.", -1, methods
+};
+
+PyMODINIT_FUNC PyInit_playlist_backend_ext(void) {
+    return PyModule_Create(&moduledef);
+}
@@ -0,0 +1,14 @@
+from setuptools import setup, Extension
+
+# Builds the playlist_backend_ext module used by music_playlist_gui_c.py:
+#   python setup.py build_ext --inplace
+setup(
+    name="musify-playlist-backend",
+    version="0.1",
+    ext_modules=[
+        Extension(
+            "playlist_backend_ext",
+            sources=["playlist_backend_ext.c", "playlist_backend.c"],
+        )
+    ],
+)